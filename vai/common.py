@@ -1,7 +1,11 @@
 """Common utilities and constants for VAI demo"""
 
+import functools
+import os
 import subprocess
 
+import numpy as np
+
 GRAPH_SAMPLE_WINDOW_SIZE_s = 31
 HW_SAMPLING_PERIOD_ms = 250
 GRAPH_DRAW_PERIOD_ms = 30
@@ -22,66 +26,109 @@ TRIA_PINK_RGBH = (0xFE, 0x00, 0xA2)
 TRIA_BLUE_RGBH = (0x00, 0xA2, 0xFE)
 TRIA_YELLOW_RGBH = (0xFE, 0xDB, 0x00)
 
-# WARN: These commands will be processed by application. Tags like <TAG> are likely placeholder
+# WARN: These commands are templates; {key} fields are filled in by the
+# handler via str.format_map at demo start
 
 # Having one default is fine, as we can extrapolate for the other window
-DEFAULT_LEFT_WINDOW = "waylandsink async=true sync=false <ONE_WINDOW_XYWH>"
-DEFAULT_DUAL_WINDOW = "waylandsink async=true sync=false <DUAL_WINDOW_XYWH>"
+DEFAULT_LEFT_WINDOW = "waylandsink async=true sync=false x={x} y={y} width={w} height={h}"
+DEFAULT_DUAL_WINDOW = "waylandsink async=true sync=false x={dual_x} y={dual_y} width={dual_w} height={dual_h}"
+
+# Default queues buffer up to 200 frames / 1 s and will happily stall the
+# whole pipeline; leaky=downstream keeps the display branch at rate and
+# drops stale frames headed for the (slower) inference branch instead
+Q = "queue leaky=downstream max-size-buffers=2 max-size-time=0 max-size-bytes=0"
+
+# Prefer the int8 A8W8 AI-Hub exports when the image ships them; the HTP
+# runs int8 natively, so wider activations just waste DDR bandwidth.
+# Probed from the filesystem (like the delegate below) so older images
+# without the export keep working; VAI_AIHUB_MODELS=0/1 forces either way
+AIHUB_SEGMENTATION_MODEL = "/opt/deeplabv3_plus_mobilenet_quantized_aihub.tflite"
+USE_AIHUB_QUANTIZED_MODELS = (
+    os.environ["VAI_AIHUB_MODELS"] != "0"
+    if "VAI_AIHUB_MODELS" in os.environ
+    else os.path.isfile(AIHUB_SEGMENTATION_MODEL)
+)
+
+SEGMENTATION_MODEL = (
+    AIHUB_SEGMENTATION_MODEL
+    if USE_AIHUB_QUANTIZED_MODELS
+    else "/opt/deeplabv3_plus_mobilenet_quantized.tflite"
+)
+
+QNN_TFLITE_DELEGATE_NAME = "libQnnTFLiteDelegate.so"
+
+
+def _pick_tflite_delegate():
+    """Compose the qtimltflite delegate arguments for this device.
+
+    Prefer the QNN HTP delegate when its library is resolvable; otherwise
+    fall back to XNNPACK so CPU inference still gets Neon-vectorized
+    kernels instead of the reference TFLite ones.
+    """
+    search_paths = os.environ.get("LD_LIBRARY_PATH", "").split(":")
+    search_paths += ["/usr/lib", "/usr/lib64", "/lib"]
+    for path in search_paths:
+        if path and os.path.isfile(os.path.join(path, QNN_TFLITE_DELEGATE_NAME)):
+            return (
+                f"delegate=external external-delegate-path={QNN_TFLITE_DELEGATE_NAME} "
+                'external-delegate-options="QNNExternalDelegate,backend_type=htp;"'
+            )
+    return "delegate=xnnpack"
+
+
+TFLITE_DELEGATE = _pick_tflite_delegate()
+# The SNPE pipelines stay on the DSP; switch to "aip" here for HTA fallback
+SNPE_DELEGATE = "dsp"
 
 # TODO: add FPS support for camera?
 # TODO: What is the most reasonable caps res out of camera? Seems to be 640x480 when running two usb 2.0 cams
-CAMERA = f"<DATA_SRC> ! qtivtransform ! video/x-raw(memory:GBM),format=NV12,width=640,height=480,framerate=30/1,compression=ubwc ! {DEFAULT_LEFT_WINDOW}"
+CAMERA = f"{{data_src}} ! qtivtransform ! video/x-raw(memory:GBM),format=NV12,width=640,height=480,framerate=30/1,compression=ubwc ! {DEFAULT_LEFT_WINDOW}"
 
-POSE_DETECTION = "<DATA_SRC> ! qtivtransform ! video/x-raw(memory:GBM),format=NV12,width=640,height=480,framerate=30/1,compression=ubwc ! \
+POSE_DETECTION = f"{{data_src}} ! qtivtransform ! video/x-raw(memory:GBM),format=NV12,width=640,height=480,framerate=30/1,compression=ubwc ! \
 tee name=split \
-split. ! queue ! qtivcomposer name=mixer ! <SINGLE_DISPLAY> \
-split. ! queue ! qtimlvconverter ! qtimltflite delegate=external external-delegate-path=libQnnTFLiteDelegate.so external-delegate-options=\"QNNExternalDelegate,backend_type=htp;\" \
+split. ! {Q} ! qtivcomposer name=mixer ! {{single_display}} \
+split. ! {Q} ! qtimlvconverter ! qtimltflite {TFLITE_DELEGATE} \
 model=/opt/posenet_mobilenet_v1.tflite ! qtimlvpose threshold=51.0 results=2 module=posenet labels=/opt/posenet_mobilenet_v1.labels \
-constants=\"Posenet,q-offsets=<128.0,128.0,117.0>,q-scales=<0.0784313753247261,0.0784313753247261,1.3875764608383179>;\" ! video/x-raw,format=BGRA,width=640,height=480 ! mixer."
+constants=\"Posenet,q-offsets=<128.0,128.0,117.0>,q-scales=<0.0784313753247261,0.0784313753247261,1.3875764608383179>;\" ! video/x-raw(memory:GBM),format=NV12,width=640,height=480 ! mixer."
 
-CLASSIFICATION = '<DATA_SRC> ! qtivtransform ! video/x-raw(memory:GBM),format=NV12,width=640,height=480,framerate=30/1,compression=ubwc ! \
+CLASSIFICATION = f'{{data_src}} ! qtivtransform ! video/x-raw(memory:GBM),format=NV12,width=640,height=480,framerate=30/1,compression=ubwc ! \
 tee name=split \
-split. ! queue ! qtivcomposer name=mixer sink_1::position="<30,30>" sink_1::dimensions="<320, 180>" ! queue ! <SINGLE_DISPLAY> \
-split. ! queue ! qtimlvconverter ! queue ! qtimlsnpe delegate=dsp model=/opt/inceptionv3.dlc ! queue ! qtimlvclassification threshold=40.0 results=2 \
-module=mobilenet labels=/opt/classification.labels ! video/x-raw,format=BGRA,width=640,height=360 ! queue ! mixer.'
+split. ! {Q} ! qtivcomposer name=mixer sink_1::position="<30,30>" sink_1::dimensions="<320, 180>" ! {Q} ! {{single_display}} \
+split. ! {Q} ! qtimlvconverter ! {Q} ! qtimlsnpe delegate={SNPE_DELEGATE} model=/opt/inceptionv3.dlc ! {Q} ! qtimlvclassification threshold=40.0 results=2 \
+module=mobilenet labels=/opt/classification.labels ! video/x-raw(memory:GBM),format=NV12,width=640,height=360 ! {Q} ! mixer.'
 
-OBJECT_DETECTION = '<DATA_SRC> ! qtivtransform ! video/x-raw(memory:GBM),format=NV12,width=640,height=480,framerate=30/1,compression=ubwc ! \
+OBJECT_DETECTION = f'{{data_src}} ! qtivtransform ! video/x-raw(memory:GBM),format=NV12,width=640,height=480,framerate=30/1,compression=ubwc ! \
 tee name=split \
-split. ! queue ! qtivcomposer name=mixer1 ! queue ! <SINGLE_DISPLAY> \
-split. ! queue ! qtimlvconverter ! queue ! qtimlsnpe delegate=dsp model=/opt/yolonas.dlc layers="</heads/Mul, /heads/Sigmoid>" ! queue ! qtimlvdetection threshold=51.0 results=10 module=yolo-nas labels=/opt/yolonas.labels \
-! video/x-raw,format=BGRA,width=640,height=480 ! queue ! mixer1.'
+split. ! {Q} ! qtivcomposer name=mixer1 ! {Q} ! {{single_display}} \
+split. ! {Q} ! qtimlvconverter ! {Q} ! qtimlsnpe delegate={SNPE_DELEGATE} model=/opt/yolonas.dlc layers="</heads/Mul, /heads/Sigmoid>" ! {Q} ! qtimlvdetection threshold=51.0 results=10 module=yolo-nas labels=/opt/yolonas.labels \
+! video/x-raw(memory:GBM),format=NV12,width=640,height=480 ! {Q} ! mixer1.'
 
-DEPTH_SEGMENTATION = "<DATA_SRC> ! qtivtransform ! \
+DEPTH_SEGMENTATION = f"{{data_src}} ! qtivtransform ! \
     video/x-raw(memory:GBM),format=NV12,width=640,height=480,framerate=30/1,compression=ubwc ! \
     tee name=split \
-    split. ! queue ! qtivcomposer background=0 name=dual \
+    split. ! {Q} ! qtivcomposer background=0 name=dual \
         sink_0::position=\<0,0\> sink_0::dimensions=\<960,720\> \
         sink_1::position=\<960,0\> sink_1::dimensions=\<960,720\> \
-    ! queue ! <DUAL_DISPLAY> \
-    split. ! queue ! qtimlvconverter ! queue ! \
-        qtimltflite delegate=external \
-            external-delegate-path=libQnnTFLiteDelegate.so \
-            external-delegate-options=QNNExternalDelegate,backend_type=htp \
-            model=/opt/Midas-V2-Quantized.tflite ! queue ! \
+    ! {Q} ! {{dual_display}} \
+    split. ! {Q} ! qtimlvconverter ! {Q} ! \
+        qtimltflite {TFLITE_DELEGATE} \
+            model=/opt/Midas-V2-Quantized.tflite ! {Q} ! \
         qtimlvsegmentation module=midas-v2 labels=/opt/monodepth.labels \
             constants=\"Midas,q-offsets=<0.0>,q-scales=<4.716535568237305>;\" ! \
-        video/x-raw,width=960,height=720 ! queue ! dual.sink_1"
-
-SEGMENTATION = '<DATA_SRC> ! qtivtransform ! video/x-raw(memory:GBM),format=NV12,width=640,height=480,framerate=30/1,compression=ubwc !queue ! tee name=split \
-split. ! queue ! qtivcomposer name=mixer sink_1::alpha=0.65 ! queue ! <SINGLE_DISPLAY> \
-split. ! queue ! \
-  qtimlvconverter ! queue ! \
-  qtimltflite \
-      delegate=external \
-      external-delegate-path=libQnnTFLiteDelegate.so \
-      external-delegate-options="QNNExternalDelegate,backend_type=htp" \
-      model=/opt/deeplabv3_plus_mobilenet_quantized.tflite ! queue ! \
+        video/x-raw(memory:GBM),format=NV12,width=960,height=720 ! {Q} ! dual.sink_1"
+
+SEGMENTATION = f'{{data_src}} ! qtivtransform ! video/x-raw(memory:GBM),format=NV12,width=640,height=480,framerate=30/1,compression=ubwc ! {Q} ! tee name=split \
+split. ! {Q} ! qtivcomposer name=mixer sink_1::alpha=0.65 ! {Q} ! {{single_display}} \
+split. ! {Q} ! \
+  qtimlvconverter ! {Q} ! \
+  qtimltflite {TFLITE_DELEGATE} \
+      model={SEGMENTATION_MODEL} ! {Q} ! \
   qtimlvsegmentation \
       module=deeplab-argmax \
       labels=/opt/voc_labels.txt \
       constants="deeplab,q-offsets=<0.0>,q-scales=<1.0>" ! \
-  video/x-raw,format=BGRA,width=640,height=480 ! \
-  queue ! mixer.'
+  video/x-raw(memory:GBM),format=NV12,width=640,height=480 ! \
+  {Q} ! mixer.'
 
 
 APP_NAME = f"QCS6490 Vision AI"
@@ -96,11 +143,67 @@ TRIA = r"""
 """
 
 
+class Ring:
+    """Fixed-capacity ring buffer backed by a contiguous NumPy array.
+
+    Drop-in for the bounded deques used by the graph data: supports
+    append/popleft/len/indexing, while view() exposes the live samples as
+    an ndarray so the draw code can consume them without per-sample boxing.
+    """
+
+    __slots__ = ("buf", "start", "count")
+
+    def __init__(self, size, dtype=np.float32):
+        self.buf = np.zeros(size, dtype=dtype)
+        self.start = 0
+        self.count = 0
+
+    def append(self, value):
+        size = self.buf.size
+        self.buf[(self.start + self.count) % size] = value
+        if self.count < size:
+            self.count += 1
+        else:
+            # Full: the oldest sample was just overwritten
+            self.start = (self.start + 1) % size
+
+    def popleft(self):
+        if not self.count:
+            raise IndexError("pop from an empty Ring")
+        value = self.buf[self.start]
+        self.start = (self.start + 1) % self.buf.size
+        self.count -= 1
+        return value
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("Ring index out of range")
+        return self.buf[(self.start + index) % self.buf.size]
+
+    def view(self):
+        """Return the live samples, oldest first, as a contiguous ndarray."""
+        size = self.buf.size
+        end = self.start + self.count
+        if end <= size:
+            return self.buf[self.start : end]
+        return np.concatenate((self.buf[self.start :], self.buf[: end - size]))
+
+
 def lerp(a, b, t):
     """Linear interpolation between two values"""
     return a + t * (b - a)
 
 
+def lerp_vec(a, b, t, out=None):
+    """Vectorized lerp for array-typed t; scalar callers keep using lerp"""
+    return np.add(a, (b - a) * t, out=out)
+
+
 def inverse_lerp(a, b, v):
     """Inverse linear interpolation between two values"""
     return (v - a) / (b - a) if a != b else 0.0
@@ -125,19 +228,27 @@ def get_ema(x_cur, x_last, alpha=0.75):
     return alpha * x_cur + (1 - alpha) * x_last
 
 
+@functools.lru_cache(maxsize=1)
 def app_version():
-    """Get the latest tag or commit hash if possible, unknown otherwise"""
+    """Get the version from the environment or git if possible, unknown otherwise
+
+    Shipped images should set VAI_VERSION at build time so no git
+    subprocess is forked at all; the dev fallback is a single git call.
+    """
+
+    version = os.environ.get("VAI_VERSION")
+    if version:
+        return version
 
     try:
         version = subprocess.check_output(
-            ["git", "describe", "--tags", "--always"], text=True
+            ["git", "-C", os.path.dirname(__file__), "log", "-1",
+             "--format=%h %cd", "--date=short"],
+            text=True,
+            stderr=subprocess.DEVNULL,
         ).strip()
-        date = subprocess.check_output(
-            ["git", "log", "-1", "--format=%cd", "--date=short"], text=True
-        ).strip()
-
-        return f"{version} {date}"
-    except subprocess.CalledProcessError:
+        return version or "unknown"
+    except Exception:
         # Handle errors, such as not being in a Git repository
         return "unknown"
 
@@ -1,4 +1,6 @@
-from .common import inverse_lerp, lerp
+import numpy as np
+
+from .common import inverse_lerp, lerp, lerp_vec
 
 # Scaling boundaries (assumes res between 1920x1080 and 3840x2160)
 GRAPH_LABEL_FONT_SIZE_MIN = 14
@@ -293,23 +295,28 @@ def draw_graph_data(
             continue  # Skip if no color for this data (like timestamps)
 
         cr.set_source_rgb(*data_color_map[data_key])
-        # Start the cursor at the first data point if possible
-        # x is 0 or width because our data must always fit between 0 and width, (not the case for y values)
-        cr.move_to(
-            0 if data else width,
-            (
-                height
-                if not data
-                else int(lerp(0, height, 1 - inverse_lerp(y_lim[0], y_lim[1], data[0])))
-            ),
-        )
-        # We must inverse lerp to get the % of the y value between the min and max y values for instances where y_lim is not 0-100
-        for x in range(1, len(data)):
-            y_pct = inverse_lerp(y_lim[0], y_lim[1], data[x])
-            cr.line_to(
-                int(
-                    lerp(0, width, x / len(data))
-                ),  # cant divide by 0 in this range definition
-                int(lerp(0, height, 1 - y_pct)),
-            )
+
+        # Ring buffers expose their samples as an ndarray; anything else
+        # (lists in tests, etc.) is converted once
+        samples = data.view() if hasattr(data, "view") else np.asarray(data)
+        if not samples.size:
+            # x is 0 or width because our data must always fit between 0 and width
+            cr.move_to(width, height)
+            cr.stroke()
+            continue
+
+        # We must inverse lerp to get the % of the y value between the min and
+        # max y values for instances where y_lim is not 0-100; one vectorized
+        # pass replaces the per-point Python arithmetic
+        if y_lim[0] != y_lim[1]:
+            y_pct = (samples - y_lim[0]) / (y_lim[1] - y_lim[0])
+        else:
+            y_pct = np.zeros(samples.size, dtype=np.float32)
+        ys = lerp_vec(0, height, 1.0 - y_pct).astype(int)
+        # cant divide by 0 in this range definition
+        xs = lerp_vec(0, width, np.arange(samples.size) / samples.size).astype(int)
+
+        cr.move_to(xs[0], ys[0])
+        for x_px, y_px in zip(xs[1:].tolist(), ys[1:].tolist()):
+            cr.line_to(x_px, y_px)
         cr.stroke()
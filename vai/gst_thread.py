@@ -2,34 +2,152 @@ import threading
 import time
 
 import gi
-import subprocess
 
 gi.require_version("Gst", "1.0")
 from gi.repository import GLib, Gst
 
 GST_WATCHDOG_TIMER_MAX_s = 1.5
-GST_WATCHDOG_CHECK_PERIOD_ms = 250
+# Pinned on first run() so factory lookups keep hitting the in-process
+# registry cache instead of re-reading feature files from disk
+_gst_registry = None
+# Fixed pool size for qtivtransform outputs; enough to cover the tee
+# branches plus queue depth without per-frame GBM allocations
+GST_TRANSFORM_OUTPUT_BUFFERS = 8
 
 
 class GstPipeline(threading.Thread):
+    """Run a GST pipeline in-process, restarting it if frames stop flowing.
+
+    The handler injects an `identity name=id` element into every pipeline;
+    its handoff signal timestamps the last buffer seen so the watchdog can
+    detect a stalled stream (e.g. a camera hiccup) and relaunch it.
+    """
 
     def __init__(self, gst_command, myName):
         threading.Thread.__init__(self)
         self.gst_command = gst_command
-        self.myName= myName
+        self.myName = myName
+        self.pipeline = None
+        self.enabled = False
+        self.last_buffer_time = None
+        self._watchdog_id = None
+        self._has_health_signal = False
+        self._bus = None
+        # Set once the first buffer flows; lets callers wait event-driven
+        # for pipeline readiness instead of polling
+        self.first_frame = threading.Event()
 
-    def camPreview(self, gst_command):
-        self.enabled = True
-        gst_command = 'exec -a ' + self.myName +' gst-launch-1.0 '+gst_command.replace('(memory:GBM)', '\(memory:GBM\)')+' &'
-        subprocess.run(gst_command,
-                        shell=True,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE
-                        )
+    def _on_buffer_handoff(self, element, buffer):
+        # Called from the GStreamer streaming thread; a plain store is fine
+        self.last_buffer_time = time.monotonic()
+        if not self.first_frame.is_set():
+            self.first_frame.set()
+
+    def _on_async_done(self, bus, message):
+        # Preroll complete: the pipeline is up even before (or without) the
+        # identity element's first handoff, so callers waiting on readiness
+        # unblock event-driven rather than by polling
+        self.first_frame.set()
+
+    def _hint_transform_buffer_pools(self):
+        """Ask each qtivtransform for a fixed output pool so NV12 buffers get reused.
+
+        Best-effort: silently skipped on plugin builds without the property.
+        """
+        iterator = self.pipeline.iterate_elements()
+        while True:
+            result, element = iterator.next()
+            if result == Gst.IteratorResult.RESYNC:
+                iterator.resync()
+                continue
+            if result != Gst.IteratorResult.OK:
+                break
+            factory = element.get_factory()
+            if factory is None or factory.get_name() != "qtivtransform":
+                continue
+            if element.find_property("output-buffers") is not None:
+                element.set_property(
+                    "output-buffers", GST_TRANSFORM_OUTPUT_BUFFERS
+                )
+
+    def _launch_pipeline(self):
+        # Parse once; watchdog restarts reuse the already-built element graph
+        if self.pipeline is None:
+            self.pipeline = Gst.parse_launch(self.gst_command)
+            self._hint_transform_buffer_pools()
+
+            self._bus = self.pipeline.get_bus()
+            self._bus.add_signal_watch()
+            self._bus.connect("message::async-done", self._on_async_done)
+
+            identity_element = self.pipeline.get_by_name("id")
+            self._has_health_signal = identity_element is not None
+            if identity_element is not None:
+                identity_element.props.signal_handoffs = True
+                identity_element.connect("handoff", self._on_buffer_handoff)
+
+        # Give the pipeline a full window to produce its first buffer; without
+        # a health signal the watchdog disables itself
+        self.last_buffer_time = (
+            time.monotonic() if self._has_health_signal else None
+        )
+        self.pipeline.set_state(Gst.State.PLAYING)
+
+    def _restart_pipeline(self):
+        """Cycle the existing pipeline through NULL rather than re-parsing it."""
+        self.pipeline.set_state(Gst.State.NULL)
+        self._launch_pipeline()
+
+    def _pipeline_teardown(self):
+        if self.pipeline is not None:
+            if self._bus is not None:
+                self._bus.remove_signal_watch()
+                self._bus = None
+            self.pipeline.set_state(Gst.State.NULL)
+            # Wait (bounded) for the transition to finish so the v4l2 device
+            # is actually released before the caller starts the next demo
+            self.pipeline.get_state(500 * Gst.MSECOND)
+            self.pipeline = None
+
+    def _arm_watchdog(self, delay_s):
+        self._watchdog_id = GLib.timeout_add(
+            int(delay_s * 1000), self._watchdog_timer_check
+        )
+
+    def _watchdog_timer_check(self):
+        """One-shot deadline check: re-arm while frames flow, restart otherwise."""
+        self._watchdog_id = None
+        if not self.enabled or self.pipeline is None or self.last_buffer_time is None:
+            return False
+
+        remaining_s = self.last_buffer_time + GST_WATCHDOG_TIMER_MAX_s - time.monotonic()
+        if remaining_s > 0:
+            # Buffers arrived since this shot was armed; sleep out the remainder
+            self._arm_watchdog(remaining_s)
+            return False
+
+        print(f"{self.myName}: pipeline stalled, restarting")
+        self._restart_pipeline()
+        if self.last_buffer_time is not None:
+            self._arm_watchdog(GST_WATCHDOG_TIMER_MAX_s)
+        return False
 
     def close(self):
-        subprocess.run(['pkill', '-f', self.myName])  # Send SIGTERM to the process group
         self.enabled = False
+        if self._watchdog_id is not None:
+            GLib.source_remove(self._watchdog_id)
+            self._watchdog_id = None
+        self._pipeline_teardown()
 
     def run(self):
-        self.camPreview(self.gst_command)
+        global _gst_registry
+        # The manager initializes Gst at startup; don't re-walk the plugin
+        # registry for every demo pipeline
+        if not Gst.is_initialized():
+            Gst.init(None)
+        if _gst_registry is None:
+            _gst_registry = Gst.Registry.get()
+        self.enabled = True
+        self._launch_pipeline()
+        if self.last_buffer_time is not None:
+            self._arm_watchdog(GST_WATCHDOG_TIMER_MAX_s)
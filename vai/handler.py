@@ -1,8 +1,7 @@
-import pathlib
+import logging
+import os
 import signal
-import subprocess
 import sys
-from time import sleep
 
 import gi
 
@@ -41,6 +40,8 @@ DUAL_WINDOW_DEMOS = ["depth segmentation"]
 
 PIPELINE_HEALTH_SIGNAL = "identity signal-handoffs=true name=id"
 
+log = logging.getLogger(__name__)
+
 
 class Handler:
     def __init__(self, display_fps_metrics=True):
@@ -99,27 +100,28 @@ class Handler:
     def scan_for_connected_usb_cameras(self):
         """Scans for cameras via v4l, populating the USBCameras list with the camera name and path, returning the number of cameras found."""
 
-        usb_cameras_path = pathlib.Path("/dev/v4l/by-id")
-        if not usb_cameras_path.exists():
+        try:
+            # By testing, video-index0 is the camera capable of video streaming.
+            # Sorted so camera ordering is deterministic across boots
+            entries = sorted(
+                entry.name
+                for entry in os.scandir("/dev/v4l/by-id")
+                if "video-index0" in entry.name
+            )
+        except FileNotFoundError:
             print(
                 "Warning: no USB cameras found. Please examine your USB camera connections."
             )
             return 0
-
-        try:
-            output = subprocess.check_output(["ls", "/dev/v4l/by-id"])
-            device_id = -1
-            for device_info in output.decode().splitlines():
-                # By testing, video-index0 is the camera capable of video streaming
-                if "video-index0" in device_info:
-                    device_id = device_id + 1
-                    self.USBCameras.append(
-                        ("USB CAM" + str(device_id), "/dev/v4l/by-id/" + device_info)
-                    )
         except Exception as e:
             print(f"Error scanning for USB cameras: {e}")
-        finally:
-            return len(self.USBCameras)
+            return 0
+
+        for device_id, device_info in enumerate(entries):
+            self.USBCameras.append(
+                (f"USB CAM{device_id}", f"/dev/v4l/by-id/{device_info}")
+            )
+        return len(self.USBCameras)
 
     def exit(self, payload):
         """Handle exit signals and clean up resources before exiting the application.
@@ -141,62 +143,58 @@ class Handler:
         cpu_temp, gpu_temp, mem_temp = get_cpu_gpu_mem_temps()
 
         self.sample_data[CPU_THERMAL_KEY] = cpu_temp
-        if cpu_temp is not None:
-            GLib.idle_add(
-                self.IdleUpdateLabels,
-                self.CPU_temp,
-                "{:.2f}".format(cpu_temp, 2),
-            )
         self.sample_data[GPU_THERMAL_KEY] = gpu_temp
-        if gpu_temp is not None:
-            GLib.idle_add(
-                self.IdleUpdateLabels,
-                self.GPU_temp,
-                "{:.2f}".format(gpu_temp, 2),
-            )
         self.sample_data[MEM_THERMAL_KEY] = mem_temp
-        if mem_temp is not None:
-            GLib.idle_add(
-                self.IdleUpdateLabels,
-                self.MEM_temp,
-                "{:.2f}".format(mem_temp, 2),
-            )
 
+        updates = [
+            (label, f"{temp:.2f}")
+            for label, temp in (
+                (self.CPU_temp, cpu_temp),
+                (self.GPU_temp, gpu_temp),
+                (self.MEM_temp, mem_temp),
+            )
+            if temp is not None
+        ]
+        if updates:
+            GLib.idle_add(self.IdleUpdateLabels, updates)
         return True
 
-    def update_loads(self):
-        cpu_util, gpu_util, mem_util = (
-            self.QProf.get_cpu_usage_pct(),
-            self.QProf.get_gpu_usage_pct(),
-            self.QProf.get_memory_usage_pct(),
-        )
+    def on_qprof_sample(self, cpu_util, gpu_util, mem_util):
+        """Push hook for QProfProcess: runs on the reader thread, once per sample.
+
+        Label updates are marshalled onto the GTK main thread; this fires at
+        qprof's sampling rate instead of the old per-tick Get* polling.
+        """
+        GLib.idle_add(self._apply_metrics, cpu_util, gpu_util, mem_util)
+
+    def _apply_metrics(self, cpu_util, gpu_util, mem_util):
         self.sample_data[CPU_UTIL_KEY] = cpu_util
         self.sample_data[GPU_UTIL_KEY] = gpu_util
         self.sample_data[MEM_UTIL_KEY] = mem_util
-        GLib.idle_add(
-            self.IdleUpdateLabels,
-            self.CPU_load,
-            "{:.2f}".format(cpu_util, 2),
-        )
-        GLib.idle_add(
-            self.IdleUpdateLabels,
-            self.GPU_load,
-            "{:.2f}".format(gpu_util, 2),
-        )
-        GLib.idle_add(
-            self.IdleUpdateLabels,
-            self.MEM_load,
-            "{:.2f}".format(mem_util, 2),
-        )
-        return True
+        self.CPU_load.set_text(f"{cpu_util:.2f}")
+        self.GPU_load.set_text(f"{gpu_util:.2f}")
+        self.MEM_load.set_text(f"{mem_util:.2f}")
+        return False
 
     def update_sample_data(self):
-        return self.update_temps() and self.update_loads()
+        # Loads arrive pushed from the profiler; only temps still poll
+        return self.update_temps()
 
     def close_about(self, *args):
         self.aboutWindow.hide()
 
     def open_about(self, *args):
+        if self.aboutWindow is None:
+            # Built on first use; startup only parses the main window tree
+            # out of the glade file
+            about_builder = Gtk.Builder()
+            # Close1 is the close button's image, a top-level object the
+            # dialog references rather than contains
+            about_builder.add_objects_from_file(
+                self.layout_path, ("Close1", "aboutWindow")
+            )
+            about_builder.connect_signals(self)
+            self.aboutWindow = about_builder.get_object("aboutWindow")
         self.aboutWindow.set_transient_for(self.MainWindow)
         self.aboutWindow.run()
 
@@ -215,7 +213,7 @@ class Handler:
     def _modify_command_pipeline(
         self, command, stream_index, inject_health_signal=True
     ):
-        """Modify GST pipeline by replacing placeholders with runtime values."""
+        """Fill the GST pipeline template's placeholder keys with runtime values."""
 
         # TODO: support l/r windows through parameterization or other technique
         displaysink_text = (
@@ -224,42 +222,36 @@ class Handler:
             else ""
         )
 
-        # NOTE: if fpsdisplaysink is used, the video-sink property needs wrapped; "" does that
-        command = command.replace(
-            "<SINGLE_DISPLAY>",
-            f'{displaysink_text}"{DEFAULT_LEFT_WINDOW}"',
-        )
-        command = command.replace(
-            "<DUAL_DISPLAY>",
-            f'{displaysink_text}"{DEFAULT_DUAL_WINDOW}"',
-        )
-
         # TODO: If we do file processing, we'll need to support that around here
         health_monitor_addin = (
             " ! " + PIPELINE_HEALTH_SIGNAL if inject_health_signal else ""
         )
-        command = command.replace(
-            "<DATA_SRC>",
-            (
-                f"v4l2src device={self.cam1 if stream_index == 0 else self.cam2}"
-                + health_monitor_addin
-            ),
-        )
         # TODO: use rect instead of x/y/width/height ?
-        x = self.DrawArea1_x if stream_index == 0 else self.DrawArea2_x
-        y = self.DrawArea1_y if stream_index == 0 else self.DrawArea2_y
         w = self.DrawArea1_w if stream_index == 0 else self.DrawArea2_w
         h = self.DrawArea1_h if stream_index == 0 else self.DrawArea2_h
-        command = command.replace(
-            "<ONE_WINDOW_XYWH>",
-            f"x={x} y={y} width={w} height={h}",
+        fields = {
+            "data_src": (
+                f"v4l2src device={self.cam1 if stream_index == 0 else self.cam2}"
+                + health_monitor_addin
+            ),
+            "x": self.DrawArea1_x if stream_index == 0 else self.DrawArea2_x,
+            "y": self.DrawArea1_y if stream_index == 0 else self.DrawArea2_y,
+            "w": w,
+            "h": h,
+            # WARN: Stream index doesnt matter here. Its essential the dual window starts at drawarea1 and is 2*w wide
+            "dual_x": self.DrawArea1_x,
+            "dual_y": self.DrawArea1_y,
+            "dual_w": 2 * w,
+            "dual_h": h,
+        }
+        # NOTE: if fpsdisplaysink is used, the video-sink property needs wrapped; "" does that
+        fields["single_display"] = (
+            f'{displaysink_text}"{DEFAULT_LEFT_WINDOW.format_map(fields)}"'
         )
-        # WARN: Stream index doesnt matter here. Its essential the dual window starts at drawarea1 and is 2*w wide
-        command = command.replace(
-            "<DUAL_WINDOW_XYWH>",
-            f"x={self.DrawArea1_x} y={self.DrawArea1_y} width={2*w} height={h}",
+        fields["dual_display"] = (
+            f'{displaysink_text}"{DEFAULT_DUAL_WINDOW.format_map(fields)}"'
         )
-        return command
+        return command.format_map(fields)
 
     def update_window_allocations(self):
         """Dynamically determine the size and position of the video windows based on the current GUI partitioning."""
@@ -287,36 +279,32 @@ class Handler:
         # TODO: just use combo.get_active_id() instead of index. Then map into demo directly
         command = self.demoList[demoIndex][:]
         command = self._modify_command_pipeline(command, stream_index)
-        print(command)
+        # Deferred %s formatting: free when no handler consumes debug records
+        log.debug("pipeline: %s", command)
         return command
 
     def kill_demos(self, demo_process, demo_selection_combo):
         """Kill the demo process if it is running. Might have to kill multiple demos depending up next queued demo."""
 
         demo = demo_selection_combo.get_active_id()
-        kill0 = True if demo_process == 0 else False
-        kill1 = True if demo_process == 1 else False
-        if demo.lower() in DUAL_WINDOW_DEMOS:
-            if demo_process == 0:
-                self.dualDemoRunning0 = True
-            if demo_process == 1:
-                self.dualDemoRunning1 = True
-
-            kill0 = True
-            kill1 = True
+        is_dual = demo.lower() in DUAL_WINDOW_DEMOS
+        if demo_process == 0:
+            self.dualDemoRunning0 = is_dual
         else:
-            if demo_process == 0:
-                self.dualDemoRunning0 = False
-            if demo_process == 1:
-                self.dualDemoRunning1 = False
+            self.dualDemoRunning1 = is_dual
+
+        # A dual-window demo needs both windows, so both pipelines must go
+        kill0 = demo_process == 0 or is_dual
+        kill1 = demo_process == 1 or is_dual
 
+        # close() blocks until the pipeline reaches NULL, so the camera is
+        # free for the next demo without a blanket sleep here
         if kill0 and self.demoProcess0 is not None:
             self.demoProcess0.close()
             self.demoProcess0 = None
         if kill1 and self.demoProcess1 is not None:
             self.demoProcess1.close()
             self.demoProcess1 = None
-        sleep(1)
 
     def demo0_selection_changed_cb(self, combo):
         """Signal handler for the 1st demo selection combo box."""
@@ -342,8 +330,11 @@ class Handler:
             self.demoProcess1 = GstPipeline(self.getCommand(index, 1), 'process1')
             self.demoProcess1.start()
 
-    def IdleUpdateLabels(self, label, text):
-        GLib.idle_add(label.set_text, text)
+    def IdleUpdateLabels(self, updates):
+        """Apply a batch of (label, text) updates in one GTK main-thread entry."""
+        for label, text in updates:
+            label.set_text(text)
+        return False
 
     # TODO: Verify then delete CapImage calls
     def CapImage_event1(self, widget, context):
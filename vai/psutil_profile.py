@@ -1,23 +1,44 @@
-import re
-
 import psutil
 
+# Prebuilt zone lookups: a frozenset membership test beats per-entry
+# regex/string compares on a poll that runs every sampling tick.
+CPU_ZONES = frozenset("cpu%d_thermal" % i for i in range(12))
+
+# The sensor layout is fixed for the life of the process, so the zone
+# names of interest are indexed once on the first successful read
+_cpu_zone_keys = None
+_mem_zone_key = None
+_gpu_zone_key = None
+
+
+def _build_zone_index(temps):
+    global _cpu_zone_keys, _mem_zone_key, _gpu_zone_key
+    _cpu_zone_keys = [
+        name
+        for name in temps
+        if name in CPU_ZONES or (name.startswith("cpu") and name.endswith("_thermal"))
+    ]
+    _mem_zone_key = "ddr_thermal" if "ddr_thermal" in temps else None
+    _gpu_zone_key = "video_thermal" if "video_thermal" in temps else None
+
 
 def get_cpu_gpu_mem_temps():
     temps = psutil.sensors_temperatures()
-    if temps:
-        gpu_temp = 0
-        mem_temp = 0
-        max_temp = 0
-        for name, entries in temps.items():
-            for entry in entries:
-                if re.match(r"cpu\d+_thermal", name):
-                    max_temp = max(max_temp, entry.current)
-                elif name == "ddr_thermal":
-                    mem_temp: w = entry.current
-                elif name == "video_thermal":
-                    gpu_temp = entry.current
-
-        return max_temp, gpu_temp, mem_temp
-
-    return None, None, None
+    if not temps:
+        return None, None, None
+
+    if _cpu_zone_keys is None:
+        _build_zone_index(temps)
+
+    cpu_temp = 0
+    for key in _cpu_zone_keys:
+        entries = temps.get(key)
+        if entries:
+            cpu_temp = max(cpu_temp, max(entry.current for entry in entries))
+
+    mem_entries = temps.get(_mem_zone_key) if _mem_zone_key else None
+    gpu_entries = temps.get(_gpu_zone_key) if _gpu_zone_key else None
+    mem_temp = mem_entries[-1].current if mem_entries else 0
+    gpu_temp = gpu_entries[-1].current if gpu_entries else 0
+
+    return cpu_temp, gpu_temp, mem_temp
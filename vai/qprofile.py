@@ -1,4 +1,9 @@
+import atexit
+import collections
+import os
 import re
+import select
+import shutil
 import subprocess
 import threading
 import time
@@ -8,78 +13,229 @@ from vai.common import HW_SAMPLING_PERIOD_ms
 # NOTE: Its expected that you have QProf installed on your device with the necessary exports/pathing enabled as well
 # refer to QC documentation as necessary
 
+# qprof wants a bounded profile window; make it a day so the process is
+# effectively long-lived and respawns only happen on a real EOF
+QPROF_PROFILE_TIME_s = 86400
+
+
+QPROF_RESULTS_DIR = "/data/shared/QualcommProfiler/profilingresults"
+
+# Bounded sample history; at the default sampling rate this covers a few
+# minutes of telemetry without unbounded growth
+QPROF_SAMPLE_HISTORY = 1024
+
+# Drain the pipe in large chunks: one read() syscall can pick up a whole
+# burst of qprof output instead of a line's worth at a time
+QPROF_READ_CHUNK = 65536
+
+
+def _little_cluster_cpus():
+    """Discover the efficiency (lowest max-freq) CPU cluster, or None.
+
+    Probes the cpufreq policy layout rather than hardcoding the QCS6490's
+    0-3 little cluster, so this degrades gracefully on other boards.
+    """
+    clusters = []
+    try:
+        with os.scandir("/sys/devices/system/cpu/cpufreq") as policies:
+            for policy in policies:
+                if not policy.name.startswith("policy"):
+                    continue
+                try:
+                    with open(os.path.join(policy.path, "cpuinfo_max_freq")) as f:
+                        max_freq = int(f.read())
+                    with open(os.path.join(policy.path, "related_cpus")) as f:
+                        cpus = {int(cpu) for cpu in f.read().split()}
+                except (OSError, ValueError):
+                    continue
+                if cpus:
+                    clusters.append((max_freq, cpus))
+    except OSError:
+        return None
+    if len(clusters) < 2:
+        # Homogeneous (or unreadable) topology; nothing to pin to
+        return None
+    return min(clusters)[1]
+
+
+def _cleanup_profiling_results():
+    """Drop qprof's accumulated result files once, at process exit.
+
+    Direct unlinks instead of a shell 'rm -rf': no /bin/sh + /bin/rm forks.
+    """
+    try:
+        entries = list(os.scandir(QPROF_RESULTS_DIR))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                os.unlink(entry.path)
+        except OSError:
+            pass
+
 
 class QProfProcess(threading.Thread):
     """Run the Qualcomm profiler and extract metrics of interest"""
 
+    # One alternation compiled once: a single regex pass per line replaces
+    # three find() probes plus a second search on the hot reader loop
+    _METRIC_RE = re.compile(
+        rb"(CPU Total Load|GPU Utilization|Memory Usage %):\s*([0-9.]+)\s*%"
+    )
+    _METRIC_ATTRS = {
+        b"CPU Total Load": "CPU",
+        b"GPU Utilization": "GPU",
+        b"Memory Usage %": "MEM",
+    }
+    # Compiled once with the metric regex above, not per _drain call, so
+    # watchdog respawns don't pay the compile again
+    _ANSI_ESCAPE_8BIT_RE = re.compile(
+        rb"(?:\x1B[@-Z\\-_]|[\x80-\x9A\x9C-\x9F]|(?:\x1B\[|\x9B)[0-?]*[ -/]*[@-~])"
+    )
+
     def __init__(self):
+        # Base thread state first; daemon so a Ctrl-C'd GTK app can't leave
+        # the reader (and qprof) running behind it
+        super().__init__(daemon=True)
         self.enabled = True
         self.CPU = 0
         self.GPU = 0
         self.MEM = 0
-        threading.Thread.__init__(self)
+        self._proc = None
+        # Single-producer sample history: deque append/popleft are atomic
+        # under the GIL, so the reader thread streams timestamped tuples in
+        # without a lock and the UI drains them in batches on its own tick
+        self.samples = collections.deque(maxlen=QPROF_SAMPLE_HISTORY)
+        # Optional push hook, invoked from the reader thread with
+        # (cpu, gpu, mem) once per completed sample; the consumer is
+        # responsible for marshalling onto its own thread (e.g. idle_add)
+        self.on_sample = None
+        atexit.register(_cleanup_profiling_results)
+
+    def _spawn_qprof(self):
+        return subprocess.Popen(
+            f"qprof \
+                                --profile \
+                                --profile-type async \
+                                --result-format CSV \
+                                --capabilities-list profiler:apps-proc-cpu-metrics profiler:proc-gpu-specific-metrics profiler:apps-proc-mem-metrics \
+                                --profile-time {QPROF_PROFILE_TIME_s} \
+                                --sampling-rate {HW_SAMPLING_PERIOD_ms} \
+                                --streaming-rate {HW_SAMPLING_PERIOD_ms} \
+                                --live \
+                                --metric-id-list 4648 4616 4865".split(),
+            shell=False,
+            stdout=subprocess.PIPE,
+            # Nothing drains stderr; an unread pipe would eventually fill
+            # and block qprof mid-write, freezing the metrics
+            stderr=subprocess.DEVNULL,
+            bufsize=QPROF_READ_CHUNK,
+        )
+
+    def _drain(self, p):
+        """Consume qprof stdout until EOF or the thread is disabled."""
+
+        # Non-blocking drain: the thread never parks inside a pipe read,
+        # so Close() takes effect within one select timeout instead of
+        # whenever qprof next prints a line
+        fd = p.stdout.fileno()
+        os.set_blocking(fd, False)
+        buf = b""
+        while self.enabled:
+            ready, _, _ = select.select([fd], [], [], HW_SAMPLING_PERIOD_ms / 1000)
+            if not ready:
+                continue
+            try:
+                chunk = os.read(fd, QPROF_READ_CHUNK)
+            except BlockingIOError:
+                continue
+            if not chunk:
+                break
+
+            buf += chunk
+            # Scan complete lines in one finditer pass over the whole read;
+            # the unterminated tail is carried into the next iteration so a
+            # metric split across read boundaries is never lost
+            cut = buf.rfind(b"\n")
+            if cut < 0:
+                continue
+            # Raw bytes all the way: the regexes below don't care about
+            # stray non-ASCII, so no decode/encode is needed
+            scan = self._ANSI_ESCAPE_8BIT_RE.sub(b"", buf[: cut + 1])
+            buf = buf[cut + 1 :]
+
+            for result in self._METRIC_RE.finditer(scan):
+                # Publish display-ready values: rounding happens once per
+                # sample here, not on every read from the GTK side. qprof
+                # usually emits whole-number percentages, and int() on
+                # bytes is much cheaper than the PyFloat_FromString path
+                raw = result.group(2)
+                value = int(raw) if b"." not in raw else round(float(raw), 2)
+                setattr(self, self._METRIC_ATTRS[result.group(1)], value)
+                # MEM is the last metric qprof prints per sampling tick,
+                # so a complete (ts, CPU, GPU, MEM) row is recorded then
+                if result.group(1) == b"Memory Usage %":
+                    self.samples.append(
+                        (time.monotonic(), self.CPU, self.GPU, self.MEM)
+                    )
+                    if self.on_sample is not None:
+                        self.on_sample(self.CPU, self.GPU, self.MEM)
 
     def run(self):
-        """Run a qprof subprocess until the thread is disabled via Close()."""
+        """Run one long-lived qprof subprocess, respawning only on real EOF."""
+
+        # Keep profiling off the UI/frame-delivery path: bind this thread to
+        # the little cluster and deprioritize it. Best-effort on both counts.
+        try:
+            little_cpus = _little_cluster_cpus()
+            if little_cpus:
+                os.sched_setaffinity(0, little_cpus)
+            os.nice(5)
+        except OSError:
+            pass
 
-        ansi_escape_8bit = re.compile(
-            rb"(?:\x1B[@-Z\\-_]|[\x80-\x9A\x9C-\x9F]|(?:\x1B\[|\x9B)[0-?]*[ -/]*[@-~])"
-        )
         while self.enabled:
             try:
-                p = subprocess.Popen(
-                    f"qprof \
-                                        --profile \
-                                        --profile-type async \
-                                        --result-format CSV \
-                                        --capabilities-list profiler:apps-proc-cpu-metrics profiler:proc-gpu-specific-metrics profiler:apps-proc-mem-metrics \
-                                        --profile-time 10 \
-                                        --sampling-rate {HW_SAMPLING_PERIOD_ms} \
-                                        --streaming-rate {HW_SAMPLING_PERIOD_ms} \
-                                        --live \
-                                        --metric-id-list 4648 4616 4865".split(),
-                    shell=False,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                )
-            except: 
+                self._proc = self._spawn_qprof()
+            except Exception:
                 self.enabled = False
-                pass
-            
-            while self.enabled:
-                # line = p.stdout.readline().decode('utf-8').encode("ascii","ignore")
-                line = p.stdout.readline().decode("utf-8").encode("ascii", "ignore")
-
-                line = ansi_escape_8bit.sub(b"", line)
-                if not line:
-                    break
-                # the real code does filtering here
-
-                if line.find(b"CPU Total Load:") > -1:
-                    result = re.search(b"CPU Total Load:(.*)%", line)
-                    self.CPU = float(result.group(1))
-                elif line.find(b"GPU Utilization:") > -1:
-                    result = re.search(b"GPU Utilization:(.*)%", line)
-                    self.GPU = float(result.group(1))
-                elif line.find(b"Memory Usage %:") > -1:
-                    result = re.search(b"Memory Usage %:(.*)%", line)
-                    self.MEM = float(result.group(1))
-
-            # cleanup output files
-            subprocess.call(
-                "/bin/rm -rf /data/shared/QualcommProfiler/profilingresults/*",
-                shell=True,
-            )
-            time.sleep(HW_SAMPLING_PERIOD_ms/1000)
+                break
+            self._drain(self._proc)
+            # qprof exited (or crashed); brief backoff before the respawn
+            time.sleep(HW_SAMPLING_PERIOD_ms / 1000)
 
     def Close(self):
         self.enabled = False
+        # Kill qprof too, so the drain sees EOF immediately rather than the
+        # thread idling out its select timeout
+        if self._proc is not None:
+            try:
+                self._proc.terminate()
+            except Exception:
+                pass
+
+    # Lock-free publication: single attribute stores/loads are atomic under
+    # the GIL, so readers just load the pre-rounded value
 
     def get_cpu_usage_pct(self):
-        return round(self.CPU, 2)
+        return self.CPU
 
     def get_gpu_usage_pct(self):
-        return round(self.GPU, 2)
+        return self.GPU
 
     def get_memory_usage_pct(self):
-        return round(self.MEM, 2)
+        return self.MEM
+
+    def drain_samples(self):
+        """Pop all buffered (ts, CPU, GPU, MEM) rows, oldest first."""
+        samples = self.samples
+        drained = []
+        while samples:
+            try:
+                drained.append(samples.popleft())
+            except IndexError:
+                break
+        return drained
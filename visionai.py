@@ -1,21 +1,18 @@
 #!/usr/bin/env python3
 
-import collections
+import logging
 import os
 import threading
 import time
 
-import gi
-
 from vai.common import (APP_HEADER, CPU_THERMAL_KEY, CPU_UTIL_KEY,
                         GPU_THERMAL_KEY, GPU_UTIL_KEY, GRAPH_SAMPLE_SIZE,
                         MEM_THERMAL_KEY, MEM_UTIL_KEY, TIME_KEY, TRIA,
                         TRIA_BLUE_RGBH, TRIA_PINK_RGBH, TRIA_YELLOW_RGBH,
                         AUTOMATIC_DEMO_SWITCH_s, GRAPH_SAMPLE_WINDOW_SIZE_s,
-                        get_ema)
+                        Ring, get_ema)
 from vai.graphing import (draw_axes_and_labels,
                           draw_graph_background_and_border, draw_graph_data)
-from vai.handler import Handler
 from vai.qprofile import QProfProcess
 
 # os.environ["XDG_RUNTIME_DIR"] = "/dev/socket/weston"
@@ -27,11 +24,25 @@ from vai.qprofile import QProfProcess
 # os.environ["LD_LIBRARY_PATH"] = "$LD_LIBRARY_PATH:/var/QualcommProfiler/libs/"
 # os.environ["PATH"] = "$PATH:/data/shared/QualcommProfiler/bins"
 
-# Locks app version, prevents warnings
-gi.require_version("Gdk", "3.0")
-gi.require_version("Gst", "1.0")
-gi.require_version("Gtk", "3.0")
-from gi.repository import Gdk, GLib, Gst, Gtk
+# GTK/GStreamer are loaded lazily by _load_gui_modules so that headless
+# callers (tests, or anything that only needs QProfProcess) don't pay for
+# GObject introspection at import time
+Gdk = GLib = Gst = Gtk = Handler = None
+
+
+def _load_gui_modules():
+    global Gdk, GLib, Gst, Gtk, Handler
+
+    import gi
+
+    # Locks app version, prevents warnings
+    gi.require_version("Gdk", "3.0")
+    gi.require_version("Gst", "1.0")
+    gi.require_version("Gtk", "3.0")
+    from gi.repository import Gdk, GLib, Gst, Gtk
+
+    # Deferred with the rest: importing the handler pulls in Gtk
+    from vai.handler import Handler
 
 # --- Graphing constants ---
 
@@ -68,7 +79,7 @@ MAX_UTIL_DISPLAYED = 100
 
 # --- End Graphing constants ---
 
-GladeBuilder = Gtk.Builder()
+GladeBuilder = None  # Created in localApp once GTK is loaded
 APP_FOLDER = os.path.dirname(__file__)
 RESOURCE_FOLDER = os.path.join(APP_FOLDER, "resources")
 LAYOUT_PATH = os.path.join(RESOURCE_FOLDER, "GSTLauncher.glade")
@@ -87,6 +98,7 @@ def get_min_time_delta_smoothed(time_series: list):
 
 class VaiDemoManager:
     def __init__(self, port=7001):
+        _load_gui_modules()
         Gst.init(None)
 
         self.eventHandler = Handler()
@@ -145,17 +157,18 @@ class VaiDemoManager:
 
     def init_graph_data(self, sample_size=GRAPH_SAMPLE_SIZE):
         """Initialize the graph data according to graph box size"""
+        # Timestamps stay float64 so precision holds over long uptimes
         self.util_data = {
-            TIME_KEY: collections.deque([], maxlen=sample_size),
-            CPU_UTIL_KEY: collections.deque([], maxlen=sample_size),
-            MEM_UTIL_KEY: collections.deque([], maxlen=sample_size),
-            GPU_UTIL_KEY: collections.deque([], maxlen=sample_size),
+            TIME_KEY: Ring(sample_size, dtype="float64"),
+            CPU_UTIL_KEY: Ring(sample_size),
+            MEM_UTIL_KEY: Ring(sample_size),
+            GPU_UTIL_KEY: Ring(sample_size),
         }
         self.thermal_data = {
-            TIME_KEY: collections.deque([], maxlen=sample_size),
-            CPU_THERMAL_KEY: collections.deque([], maxlen=sample_size),
-            MEM_THERMAL_KEY: collections.deque([], maxlen=sample_size),
-            GPU_THERMAL_KEY: collections.deque([], maxlen=sample_size),
+            TIME_KEY: Ring(sample_size, dtype="float64"),
+            CPU_THERMAL_KEY: Ring(sample_size),
+            MEM_THERMAL_KEY: Ring(sample_size),
+            GPU_THERMAL_KEY: Ring(sample_size),
         }
 
     def _sample_util_data(self):
@@ -378,7 +391,14 @@ class VaiDemoManager:
     def localApp(self):
         global GladeBuilder
 
-        GladeBuilder.add_from_file(LAYOUT_PATH)
+        GladeBuilder = Gtk.Builder()
+        # Only the objects startup needs: the main window tree plus its
+        # non-child dependencies (the combo model and the menu button
+        # images), which must be listed explicitly. The about dialog is
+        # built lazily in the menu handler.
+        GladeBuilder.add_objects_from_file(
+            LAYOUT_PATH, ("liststore1", "Info", "Quit", "mainWindow")
+        )
         GladeBuilder.connect_signals(self.eventHandler)
 
         screen = Gdk.Screen.get_default()
@@ -393,7 +413,8 @@ class VaiDemoManager:
         self.eventHandler.MainWindow.connect(
             "size-allocate", self.resize_graphs_dynamically
         )
-        self.eventHandler.aboutWindow = GladeBuilder.get_object("aboutWindow")
+        self.eventHandler.aboutWindow = None
+        self.eventHandler.layout_path = LAYOUT_PATH
         self.eventHandler.FPSRate0 = GladeBuilder.get_object("FPS_rate_0")
         self.eventHandler.FPSRate1 = GladeBuilder.get_object("FPS_rate_1")
         self.eventHandler.CPU_load = GladeBuilder.get_object("CPU_load")
@@ -430,6 +451,8 @@ class VaiDemoManager:
         self.thermal_data = None
 
         self.eventHandler.QProf = QProfProcess()
+        # Load labels update push-style, once per profiler sample
+        self.eventHandler.QProf.on_sample = self.eventHandler.on_qprof_sample
 
         # TODO: Can just put these in CSS
         self.eventHandler.MainWindow.override_background_color(
@@ -458,6 +481,9 @@ class VaiDemoManager:
 
 
 if __name__ == "__main__":
+    # Debug chatter (pipeline commands, etc.) stays off in production;
+    # lower this to DEBUG when diagnosing pipelines
+    logging.basicConfig(level=logging.WARNING)
     print(TRIA)
     print(f"\nLaunching {APP_HEADER}")
     # Create the video object